@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import logging
+import re
+from operator import attrgetter
 from typing import Any
 
 import voluptuous as vol
@@ -26,6 +28,48 @@ def async_register_websocket_handlers(hass: HomeAssistant) -> None:
     _LOGGER.info("Successfully registered 4 websocket commands")
 
 
+# Entity IDs (domain.object_id) plus the graph's synthetic device/area/label node IDs
+_NODE_ID_MATCH = re.compile(r"[a-z0-9_]+\.[a-z0-9_]+|(?:device|area|label):\S+").fullmatch
+
+
+def _is_valid_entity_id(entity_id: Any) -> bool:
+    """Return True if entity_id is a well-formed entity or graph node ID."""
+    return isinstance(entity_id, str) and _NODE_ID_MATCH(entity_id) is not None
+
+
+# GraphNode/GraphEdge fields sent to the frontend, read in one attrgetter call each
+_NODE_KEYS = ("id", "label", "domain", "area", "device_id", "state", "icon")
+_EDGE_KEYS = ("from_node", "to_node", "relationship_type", "label")
+_get_node_values = attrgetter(*_NODE_KEYS)
+_get_edge_values = attrgetter(*_EDGE_KEYS)
+
+
+def _serialize_node(node: Any) -> dict[str, Any]:
+    """Convert a GraphNode to a dict for JSON serialization."""
+    return dict(zip(_NODE_KEYS, _get_node_values(node)))
+
+
+def _serialize_edge(edge: Any) -> dict[str, Any]:
+    """Convert a GraphEdge to a dict for JSON serialization."""
+    return dict(zip(_EDGE_KEYS, _get_edge_values(edge)))
+
+
+def _result_items(result: dict[str, Any], key: str) -> list[Any]:
+    """Return the node or edge list from a graph result, or [] if unusable."""
+    items = result.get(key)
+    # Graph service always returns plain lists; tuples are copied to a list
+    if isinstance(items, list):
+        return items
+    if isinstance(items, tuple):
+        return list(items)
+    
+    if items is None:
+        _LOGGER.error("Graph service returned None for %s. Result keys: %s", key, list(result.keys()))
+    else:
+        _LOGGER.error("Graph service returned invalid %s type: %s", key, type(items))
+    return []
+
+
 @websocket_api.websocket_command({
     vol.Required("type"): "ha_visualiser/search_entities",
     vol.Required("query"): str,
@@ -69,6 +113,9 @@ async def websocket_get_neighborhood(
 ) -> None:
     """Get the neighborhood graph for an entity."""
     try:
+        if not _is_valid_entity_id(msg["entity_id"]):
+            raise ValueError(f"Invalid entity ID format: {msg['entity_id']}")
+        
         graph_service = hass.data[DOMAIN]["graph_service"]
         result = await graph_service.get_entity_neighborhood(
             msg["entity_id"],
@@ -80,47 +127,14 @@ async def websocket_get_neighborhood(
         if not isinstance(result, dict):
             raise ValueError(f"Graph service returned invalid result type: {type(result)}")
         
-        nodes = result.get("nodes")
-        edges = result.get("edges")
+        nodes = _result_items(result, "nodes")
+        edges = _result_items(result, "edges")
         center_node = result.get("center_node")
-        
-        if nodes is None:
-            _LOGGER.error("Graph service returned None for nodes. Result keys: %s", list(result.keys()))
-            nodes = []
-        elif not isinstance(nodes, (list, tuple)):
-            _LOGGER.error("Graph service returned invalid nodes type: %s", type(nodes))
-            nodes = []
-            
-        if edges is None:
-            _LOGGER.error("Graph service returned None for edges. Result keys: %s", list(result.keys()))
-            edges = []
-        elif not isinstance(edges, (list, tuple)):
-            _LOGGER.error("Graph service returned invalid edges type: %s", type(edges))
-            edges = []
             
         # Convert dataclasses to dicts for JSON serialization with safe iteration
         serialized_result = {
-            "nodes": [
-                {
-                    "id": node.id,
-                    "label": node.label,
-                    "domain": node.domain,
-                    "area": node.area,
-                    "device_id": node.device_id,
-                    "state": node.state,
-                    "icon": node.icon
-                }
-                for node in nodes
-            ],
-            "edges": [
-                {
-                    "from_node": edge.from_node,
-                    "to_node": edge.to_node,
-                    "relationship_type": edge.relationship_type,
-                    "label": edge.label
-                }
-                for edge in edges
-            ],
+            "nodes": [_serialize_node(node) for node in nodes],
+            "edges": [_serialize_edge(edge) for edge in edges],
             "center_node": center_node or msg["entity_id"]
         }
         
@@ -157,6 +171,9 @@ async def websocket_get_filtered_neighborhood(
 ) -> None:
     """Get the filtered neighborhood graph for an entity."""
     try:
+        if not _is_valid_entity_id(msg["entity_id"]):
+            raise ValueError(f"Invalid entity ID format: {msg['entity_id']}")
+        
         graph_service = hass.data[DOMAIN]["graph_service"]
         result = await graph_service.get_filtered_neighborhood(
             msg["entity_id"],
@@ -168,27 +185,8 @@ async def websocket_get_filtered_neighborhood(
         
         # Convert dataclasses to dicts for JSON serialization
         serialized_result = {
-            "nodes": [
-                {
-                    "id": node.id,
-                    "label": node.label,
-                    "domain": node.domain,
-                    "area": node.area,
-                    "device_id": node.device_id,
-                    "state": node.state,
-                    "icon": node.icon
-                }
-                for node in result["nodes"]
-            ],
-            "edges": [
-                {
-                    "from_node": edge.from_node,
-                    "to_node": edge.to_node,
-                    "relationship_type": edge.relationship_type,
-                    "label": edge.label
-                }
-                for edge in result["edges"]
-            ],
+            "nodes": [_serialize_node(node) for node in result["nodes"]],
+            "edges": [_serialize_edge(edge) for edge in result["edges"]],
             "center_node": result["center_node"],
             "filtered_count": result["filtered_count"]
         }
@@ -4,11 +4,94 @@ Pytest configuration and shared fixtures for HA Visualiser testing.
 This module provides mock fixtures for Home Assistant components to enable 
 unit testing without requiring a full HA installation.
 """
+import sys
+
 import pytest
-from unittest.mock import Mock, MagicMock, AsyncMock
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
 from typing import Dict, List, Any
 
 
+# Re-imported fresh against the mocks by websocket_api_mocks
+INTEGRATION_PACKAGE = 'custom_components.ha_visualiser'
+
+# Names the integration uses from each mocked module; anything else raises AttributeError
+CORE_SPEC = ('HomeAssistant', 'callback')
+COMPONENTS_SPEC = ('websocket_api', 'panel_custom')
+WEBSOCKET_API_SPEC = (
+    'websocket_command',
+    'require_admin',
+    'async_response',
+    'async_register_command',
+    'ActiveConnection',
+    'const',
+)
+
+# Other modules imported while loading the ha_visualiser package; only need to exist
+INTEGRATION_IMPORT_STUBS = (
+    'voluptuous',
+    'homeassistant',
+    'homeassistant.config_entries',
+    'homeassistant.const',
+    'homeassistant.components.http',
+    'homeassistant.components.panel_custom',
+    'homeassistant.helpers',
+    'homeassistant.helpers.typing',
+    'homeassistant.helpers.config_validation',
+    'homeassistant.helpers.template',
+    'homeassistant.helpers.entity_registry',
+    'homeassistant.helpers.device_registry',
+    'homeassistant.helpers.area_registry',
+    'homeassistant.helpers.label_registry',
+)
+
+
+@pytest.fixture(scope="session")
+def websocket_api_mocks():
+    """Mock the Home Assistant modules the WebSocket API needs, once for the session.
+    
+    Enough is stubbed to import custom_components.ha_visualiser.websocket_api
+    (and the package __init__ it pulls in); decorators pass functions through
+    unchanged so handlers can be called directly. The mocks are shared by
+    every test that requests them; no test currently mutates them. A test
+    that needs a clean mock should build its own instead of requesting this
+    fixture.
+    """
+    mocks = {name: Mock() for name in INTEGRATION_IMPORT_STUBS}
+    
+    mock_websocket_api = Mock(spec=WEBSOCKET_API_SPEC)
+    mock_websocket_api.websocket_command = lambda schema: lambda func: func
+    mock_websocket_api.require_admin = lambda func: func
+    mock_websocket_api.async_response = lambda func: func
+    
+    mock_components = Mock(spec=COMPONENTS_SPEC)
+    mock_components.websocket_api = mock_websocket_api
+    mock_components.panel_custom = mocks['homeassistant.components.panel_custom']
+    
+    mock_core = Mock(spec=CORE_SPEC)
+    mock_core.callback = lambda func: func
+    
+    mocks.update({
+        'homeassistant.core': mock_core,
+        'homeassistant.components': mock_components,
+        'homeassistant.components.websocket_api': mock_websocket_api,
+    })
+    
+    with patch.dict(sys.modules, mocks):
+        # Drop any copy of the integration imported against the real Home
+        # Assistant so importers get one built against these mocks
+        for name in [name for name in sys.modules if name == INTEGRATION_PACKAGE
+                     or name.startswith(INTEGRATION_PACKAGE + '.')]:
+            del sys.modules[name]
+        yield mocks
+
+
+@pytest.fixture(scope="module")
+def ws_api(websocket_api_mocks):
+    """Import the production websocket_api module against the mocked HA modules."""
+    from custom_components.ha_visualiser import websocket_api
+    return websocket_api
+
+
 @pytest.fixture
 def mock_hass():
     """Create a mock Home Assistant instance."""
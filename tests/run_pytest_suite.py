@@ -172,8 +172,7 @@ class EnhancedTestRunner:
             # Run pytest with our new test files
             pytest_args = [
                 sys.executable, '-m', 'pytest',
-                str(self.tests_dir / 'test_preference_management.py'),
-                str(self.tests_dir / 'test_graph_service_mocked.py'),
+                str(self.tests_dir / 'test_pure_logic.py'),
                 str(self.tests_dir / 'test_websocket_api_mocked.py'),
                 '-v',  # Verbose output
                 '--tb=short',  # Short traceback format
@@ -7,8 +7,17 @@ Handles missing dependencies and provides multiple testing approaches.
 import os
 import sys
 import subprocess
+import ast
 import asyncio
+import compileall
+import contextlib
+import functools
+import importlib.util
+import io
+import json
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import Mock, patch
 from pathlib import Path
 
@@ -17,23 +26,216 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 sys.path.insert(0, str(project_root / "custom_components"))
 
+_MANIFEST = "custom_components/ha_visualiser/manifest.json"
+_GRAPH_SERVICE = "custom_components/ha_visualiser/graph_service.py"
+_FRONTEND = "custom_components/ha_visualiser/www/ha-visualiser-panel.js"
+
+# Comment markers verified in graph_service.py, matched in a single pass over the file
+_GRAPH_SERVICE_MARKERS = re.compile(
+    r"(?P<condition_fix>" + re.escape("Entity -> Automation (Entity is used in Automation condition)") + r")"
+    r"|(?P<depth_consistency_fix>" + re.escape(
+        "# Always add the entity as a node (even if already visited for neighbor exploration)") + r")"
+)
+
+
+def _parameters(function):
+    """Yield (arg, default) pairs for the parameters of a function AST node."""
+    args = function.args
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    yield from zip(positional, defaults)
+    yield from zip(args.kwonlyargs, args.kw_defaults)
+
+
+def _has_parameter(function, name, annotation, default=None):
+    """Check a function AST node for an annotated parameter, optionally with a constant default."""
+    for arg, arg_default in _parameters(function):
+        if arg.arg != name or arg.annotation is None or ast.unparse(arg.annotation) != annotation:
+            continue
+        if default is None:
+            return True
+        return isinstance(arg_default, ast.Constant) and arg_default.value == default
+    return False
+
+
+# Home Assistant modules stubbed out for the import checks
+_HA_MODULES = (
+    'voluptuous',
+    'homeassistant',
+    'homeassistant.core',
+    'homeassistant.components',
+    'homeassistant.components.websocket_api',
+    'homeassistant.helpers',
+    'homeassistant.helpers.typing',
+    'homeassistant.helpers.entity_registry',
+    'homeassistant.helpers.device_registry',
+    'homeassistant.helpers.area_registry',
+    'homeassistant.helpers.label_registry',
+    'homeassistant.config_entries',
+    'homeassistant.const',
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _ha_module_mocks():
+    """Build the shared Home Assistant module mocks on first use."""
+    return {module: Mock() for module in _HA_MODULES}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_manifest(root):
+    """Read and parse the integration manifest once per run."""
+    return json.loads((root / _MANIFEST).read_text())
+
+
+class _StructureContext:
+    """Sources inspected by the structure checks, each loaded at most once."""
+    
+    def __init__(self, root):
+        self.root = root
+    
+    @functools.cached_property
+    def manifest(self):
+        try:
+            return _load_manifest(self.root)
+        except json.JSONDecodeError:
+            return {}
+    
+    @functools.cached_property
+    def graph_service(self):
+        return (self.root / _GRAPH_SERVICE).read_text()
+    
+    @functools.cached_property
+    def functions(self):
+        try:
+            tree = ast.parse(self.graph_service)
+        except SyntaxError:
+            # Let the AST-based checks fail individually instead of crashing
+            return {}
+        return {
+            node.name: node for node in ast.walk(tree)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+    
+    @functools.cached_property
+    def markers(self):
+        return {match.lastgroup for match in _GRAPH_SERVICE_MARKERS.finditer(self.graph_service)}
+    
+    @functools.cached_property
+    def frontend(self):
+        return (self.root / _FRONTEND).read_text()
+
+
+def _has_distance_traversal(context):
+    function = context.functions.get("_add_entity_and_neighbors_with_distance")
+    return function is not None and _has_parameter(function, "distances", "Dict[str, int]")
+
+
+# (source file, check name, predicate) - checks are skipped when the source is missing
+_STRUCTURE_CHECKS = (
+    (_MANIFEST, "Version 0.6.2 in manifest",
+     lambda ctx: ctx.manifest.get("version") == "0.6.2"),
+    (_GRAPH_SERVICE, "Default depth = 3 in graph_service",
+     lambda ctx: any(_has_parameter(f, "max_depth", "int", default=3) for f in ctx.functions.values())),
+    (_GRAPH_SERVICE, "Conditional relationship direction fixed",
+     lambda ctx: "condition_fix" in ctx.markers),
+    (_GRAPH_SERVICE, "Depth consistency fix applied",
+     lambda ctx: "depth_consistency_fix" in ctx.markers),
+    (_GRAPH_SERVICE, "Distance-based traversal algorithm implemented", _has_distance_traversal),
+    (_FRONTEND, "Depth control in frontend",
+     lambda ctx: 'id="depthSelect"' in ctx.frontend),
+    (_FRONTEND, "Depth parameter in WebSocket call",
+     lambda ctx: 'max_depth: maxDepth' in ctx.frontend),
+    (_FRONTEND, "Reset button functionality fixed",
+     lambda ctx: "Reset the network layout/physics" in ctx.frontend),
+    (_FRONTEND, "Canvas expanded to full height",
+     lambda ctx: "calc(100vh - 32px)" in ctx.frontend),
+)
+
+
+def _compile_file(path):
+    """Byte-compile a Python file, returning (path, ok, error).
+    
+    compileall skips files whose cached bytecode is up to date. It also fails
+    when the bytecode cannot be written (e.g. a read-only tree), so failures are
+    re-checked with an in-memory compile, which never writes to the source tree.
+    """
+    if compileall.compile_file(path, quiet=2):
+        return path, True, None
+    try:
+        compile(Path(path).read_bytes(), path, 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return path, False, f"{e.msg} (line {e.lineno})"
+    except (OSError, ValueError) as e:
+        return path, False, str(e)
+    return path, True, None
+
+
 class TestRunner:
     def __init__(self):
         self.tests_passed = 0
         self.total_tests = 0
         self.project_root = project_root
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        self._dir_entries = {}
         
     def log_test(self, name, passed, details=None):
         """Log test result."""
-        self.total_tests += 1
+        with self._counter_lock:
+            self.total_tests += 1
+            if passed:
+                self.tests_passed += 1
+        
         if passed:
-            self.tests_passed += 1
-            print(f"✅ {name}")
+            self._print(f"✅ {name}")
         else:
-            print(f"❌ {name}")
+            self._print(f"❌ {name}")
         
         if details:
-            print(f"   {details}")
+            self._print(f"   {details}")
+    
+    def _file_exists(self, relative_path):
+        """Check for a project file using one cached scandir of its directory."""
+        directory, _, name = relative_path.rpartition('/')
+        entries = self._dir_entries.get(directory)
+        if entries is None:
+            try:
+                with os.scandir(self.project_root / directory) as it:
+                    entries = {entry.name for entry in it if entry.is_file()}
+            except FileNotFoundError:
+                entries = set()
+            self._dir_entries[directory] = entries
+        return name in entries
+    
+    def _print(self, *args):
+        """Print, or buffer the output while running as a concurrent section."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            print(*args)
+        else:
+            buffer.append(' '.join(str(arg) for arg in args))
+    
+    @contextlib.contextmanager
+    def _buffer_output(self, name):
+        """Collect this thread's _print output in the yielded list.
+        
+        An exception escaping the block is logged as a failed test so the
+        section's buffered output is still printed.
+        """
+        self._local.buffer = lines = []
+        try:
+            yield lines
+        except Exception as e:
+            self.log_test(f"{name} section", False, f"Crashed: {e}")
+        finally:
+            self._local.buffer = None
+    
+    def _run_buffered(self, section):
+        """Run a verification section, returning its output lines."""
+        with self._buffer_output(section.__name__) as lines:
+            section()
+        return lines
     
     def check_dependencies(self):
         """Check if testing dependencies are available."""
@@ -47,12 +249,11 @@ class TestRunner:
         
         available = {}
         for dep, install_cmd in deps.items():
-            try:
-                __import__(dep.replace('-', '_'))
-                available[dep] = True
+            # find_spec only consults the import finders; the module is not executed
+            available[dep] = importlib.util.find_spec(dep.replace('-', '_')) is not None
+            if available[dep]:
                 print(f"✅ {dep} available")
-            except ImportError:
-                available[dep] = False
+            else:
                 print(f"❌ {dep} missing ({install_cmd})")
         
         return available
@@ -62,113 +263,66 @@ class TestRunner:
         print("\n🧪 Running pytest tests...")
         
         try:
-            # Try to run pytest
-            result = subprocess.run([
-                sys.executable, '-m', 'pytest', 
-                str(self.project_root / 'tests'),
-                '-v', '--tb=short'
-            ], capture_output=True, text=True, cwd=self.project_root)
-            
-            if result.returncode == 0:
-                self.log_test("Pytest execution", True, f"All pytest tests passed")
-                print(result.stdout)
-                return True
-            else:
-                self.log_test("Pytest execution", False, f"Some pytest tests failed")
-                print(result.stdout)
-                print(result.stderr)
-                return False
-                
-        except FileNotFoundError:
-            self.log_test("Pytest execution", False, "pytest not found")
+            import pytest
+        except ImportError:
+            self.log_test("Pytest execution", False, "pytest not importable")
             return False
+        
+        stdout, stderr = io.StringIO(), io.StringIO()
+        try:
+            # Run pytest in-process to avoid a second interpreter start-up
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                returncode = pytest.main([
+                    str(self.project_root / 'tests'),
+                    '-v', '--tb=short'
+                ])
         except Exception as e:
             self.log_test("Pytest execution", False, f"Error: {e}")
             return False
+        
+        return self._report_pytest_result(returncode, stdout.getvalue(), stderr.getvalue())
+    
+    def _report_pytest_result(self, returncode, stdout, stderr):
+        """Log the outcome of a pytest run."""
+        if returncode == 0:
+            self.log_test("Pytest execution", True, f"All pytest tests passed")
+            print(stdout)
+            return True
+        else:
+            self.log_test("Pytest execution", False, f"Some pytest tests failed")
+            print(stdout)
+            print(stderr)
+            return False
     
     def verify_code_structure(self):
         """Verify code structure and key changes."""
-        print("\n📋 Verifying code structure...")
+        self._print("\n📋 Verifying code structure...")
         
         # Test file existence
         required_files = [
             "custom_components/ha_visualiser/__init__.py",
-            "custom_components/ha_visualiser/graph_service.py", 
+            _GRAPH_SERVICE,
             "custom_components/ha_visualiser/websocket_api.py",
-            "custom_components/ha_visualiser/www/ha-visualiser-panel.js",
-            "custom_components/ha_visualiser/manifest.json"
+            _FRONTEND,
+            _MANIFEST
         ]
         
         for file_path in required_files:
-            full_path = self.project_root / file_path
-            self.log_test(f"File exists: {file_path}", full_path.exists())
-        
-        # Test version update
-        manifest_path = self.project_root / "custom_components/ha_visualiser/manifest.json"
-        if manifest_path.exists():
-            content = manifest_path.read_text()
-            version_correct = '"version": "0.6.2"' in content
-            self.log_test("Version 0.6.2 in manifest", version_correct)
-        
-        # Test depth defaults
-        graph_service_path = self.project_root / "custom_components/ha_visualiser/graph_service.py"
-        if graph_service_path.exists():
-            content = graph_service_path.read_text()
-            depth_default = re.search(r'max_depth:\s*int\s*=\s*3', content)
-            self.log_test("Default depth = 3 in graph_service", bool(depth_default))
-            
-            # Test conditional relationship fix
-            condition_fix = "Entity -> Automation (Entity is used in Automation condition)" in content
-            self.log_test("Conditional relationship direction fixed", condition_fix)
-            
-            # Test depth consistency fix
-            depth_consistency_fix = "# Always add the entity as a node (even if already visited for neighbor exploration)" in content
-            self.log_test("Depth consistency fix applied", depth_consistency_fix)
-            
-            # Test distance-based algorithm implementation
-            distance_based_algorithm = "_add_entity_and_neighbors_with_distance" in content and "distances: Dict[str, int]" in content
-            self.log_test("Distance-based traversal algorithm implemented", distance_based_algorithm)
+            self.log_test(f"File exists: {file_path}", self._file_exists(file_path))
         
-        # Test frontend changes
-        frontend_path = self.project_root / "custom_components/ha_visualiser/www/ha-visualiser-panel.js"
-        if frontend_path.exists():
-            content = frontend_path.read_text()
-            
-            depth_control = 'id="depthSelect"' in content
-            self.log_test("Depth control in frontend", depth_control)
-            
-            max_depth_param = 'max_depth: maxDepth' in content
-            self.log_test("Depth parameter in WebSocket call", max_depth_param)
-            
-            reset_fix = "Reset the network layout/physics" in content
-            self.log_test("Reset button functionality fixed", reset_fix)
-            
-            canvas_expansion = "calc(100vh - 32px)" in content
-            self.log_test("Canvas expanded to full height", canvas_expansion)
-            
+        context = _StructureContext(self.project_root)
+        for source, name, check in _STRUCTURE_CHECKS:
+            if self._file_exists(source):
+                self.log_test(name, check(context))
     
     async def test_graph_service_basics(self):
         """Test basic graph service functionality without HA dependencies."""
-        print("\n🔧 Testing graph service basics...")
+        self._print("\n🔧 Testing graph service basics...")
         
         try:
-            # Mock all homeassistant modules that might be imported
-            mock_modules = [
-                'homeassistant',
-                'homeassistant.core',
-                'homeassistant.helpers', 
-                'homeassistant.helpers.entity_registry',
-                'homeassistant.helpers.device_registry',
-                'homeassistant.helpers.area_registry',
-                'homeassistant.helpers.label_registry',
-                'homeassistant.config_entries',
-                'homeassistant.const'
-            ]
-            
-            for module in mock_modules:
-                sys.modules[module] = Mock()
-            
-            from ha_visualiser.graph_service import GraphService, GraphNode, GraphEdge
+            # Stub Home Assistant only for the import; sys.modules is restored on exit
+            with patch.dict(sys.modules, _ha_module_mocks()):
+                from ha_visualiser.graph_service import GraphService, GraphNode, GraphEdge
             
             self.log_test("GraphService import", True)
             
@@ -200,28 +354,23 @@ class TestRunner:
         except Exception as e:
             self.log_test("Graph service basics", False, str(e))
     
+    async def _import_checks(self):
+        """Run the import checks, which patch sys.modules.
+        
+        patch.dict restores sys.modules from a snapshot on exit, dropping
+        anything another thread imported meanwhile, so these must run while
+        no other section is running.
+        """
+        await self.test_graph_service_basics()
+        self.test_websocket_api_structure()
+    
     def test_websocket_api_structure(self):
         """Test WebSocket API structure."""
-        print("\n🔌 Testing WebSocket API structure...")
+        self._print("\n🔌 Testing WebSocket API structure...")
         
         try:
-            # Mock all required modules
-            mock_modules = [
-                'voluptuous',
-                'homeassistant',
-                'homeassistant.core',
-                'homeassistant.components',
-                'homeassistant.components.websocket_api',
-                'homeassistant.helpers',
-                'homeassistant.helpers.typing',
-                'homeassistant.config_entries',
-                'homeassistant.const'
-            ]
-            
-            for module in mock_modules:
-                sys.modules[module] = Mock()
-            
-            from ha_visualiser.websocket_api import async_register_websocket_handlers
+            with patch.dict(sys.modules, _ha_module_mocks()):
+                from ha_visualiser.websocket_api import async_register_websocket_handlers
             
             self.log_test("WebSocket API import", True)
             self.log_test("Handler registration function exists", callable(async_register_websocket_handlers))
@@ -231,7 +380,7 @@ class TestRunner:
     
     def lint_check(self):
         """Basic lint/syntax check."""
-        print("\n📝 Running syntax checks...")
+        self._print("\n📝 Running syntax checks...")
         
         python_files = [
             "custom_components/ha_visualiser/__init__.py",
@@ -240,23 +389,28 @@ class TestRunner:
             "custom_components/ha_visualiser/config_flow.py"
         ]
         
-        for file_path in python_files:
-            full_path = self.project_root / file_path
-            if full_path.exists():
-                try:
-                    with open(full_path, 'r') as f:
-                        compile(f.read(), file_path, 'exec')
-                    self.log_test(f"Syntax check: {file_path}", True)
-                except SyntaxError as e:
-                    self.log_test(f"Syntax check: {file_path}", False, str(e))
+        existing_files = [
+            file_path for file_path in python_files
+            if self._file_exists(file_path)
+        ]
+        
+        # Compile files in parallel; results are logged here in the original order
+        with ProcessPoolExecutor(max_workers=len(existing_files) or 1) as executor:
+            results = list(executor.map(
+                _compile_file,
+                [str(self.project_root / file_path) for file_path in existing_files]
+            ))
+        
+        for file_path, (_, ok, error) in zip(existing_files, results):
+            self.log_test(f"Syntax check: {file_path}", ok, error)
     
     def run_linting_checks(self):
         """Run comprehensive linting checks."""
-        print("\n🔍 Running linting checks...")
+        self._print("\n🔍 Running linting checks...")
         
         # Try to run the simple linter first (no external dependencies)
         lint_script = self.project_root / "lint_simple.py"
-        if lint_script.exists():
+        if self._file_exists("lint_simple.py"):
             try:
                 result = subprocess.run([
                     sys.executable, str(lint_script)
@@ -269,13 +423,13 @@ class TestRunner:
                 
                 # Show linting output
                 if result.stdout:
-                    print("\n" + "="*40 + " LINTING OUTPUT " + "="*40)
-                    print(result.stdout)
-                    print("="*96)
+                    self._print("\n" + "="*40 + " LINTING OUTPUT " + "="*40)
+                    self._print(result.stdout)
+                    self._print("="*96)
                     
                 if result.stderr:
-                    print("\nLinting errors:")
-                    print(result.stderr)
+                    self._print("\nLinting errors:")
+                    self._print(result.stderr)
                     
             except Exception as e:
                 self.log_test("Comprehensive linting", False, f"Error running linter: {e}")
@@ -284,14 +438,12 @@ class TestRunner:
     
     def integration_test(self):
         """Test integration configuration."""
-        print("\n🔗 Testing integration configuration...")
+        self._print("\n🔗 Testing integration configuration...")
         
         # Check manifest.json structure
-        manifest_path = self.project_root / "custom_components/ha_visualiser/manifest.json"
-        if manifest_path.exists():
+        if self._file_exists(_MANIFEST):
             try:
-                import json
-                manifest = json.loads(manifest_path.read_text())
+                manifest = _load_manifest(self.project_root)
                 
                 required_keys = ["domain", "name", "version", "codeowners"]
                 all_keys_present = all(key in manifest for key in required_keys)
@@ -304,16 +456,20 @@ class TestRunner:
         
         # Check HACS configuration
         hacs_path = self.project_root / "hacs.json"
-        if hacs_path.exists():
+        if self._file_exists("hacs.json"):
             try:
-                import json
                 hacs_config = json.loads(hacs_path.read_text())
                 self.log_test("HACS config valid", True)
             except json.JSONDecodeError as e:
                 self.log_test("HACS config valid", False, str(e))
     
-    async def run_all_tests(self):
-        """Run all available tests."""
+    def run_pytest_stage(self):
+        """Print the header, check dependencies and run pytest if available.
+        
+        Called from main() before the event loop starts, so pytest runs on the
+        main thread: Ctrl-C reaches it, signal-based plugins such as
+        pytest-timeout work, and pytest-asyncio can start its own loop.
+        """
         print("🚀 HA Visualiser Test Suite")
         print("=" * 60)
         
@@ -325,14 +481,28 @@ class TestRunner:
             self.run_pytest_tests()
         else:
             print("\n⚠️  Pytest not available, running manual tests...")
+    
+    async def run_all_tests(self):
+        """Run all manual verification tests and print the summary."""
+        # The import checks patch sys.modules and lint_check forks worker
+        # processes, so both run on the main thread before any worker threads
+        # exist (forking a multithreaded process can deadlock).
+        with self._buffer_output("import_checks") as import_lines:
+            await self._import_checks()
+        lint_lines = self._run_buffered(self.lint_check)
         
-        # Always run manual verification tests
-        self.verify_code_structure()
-        await self.test_graph_service_basics()
-        self.test_websocket_api_structure()
-        self.lint_check()
-        self.run_linting_checks()
-        self.integration_test()
+        # The remaining sections touch disjoint files so they run concurrently;
+        # output is buffered and printed in the original section order.
+        structure_lines, linting_lines, integration_lines = await asyncio.gather(*(
+            asyncio.to_thread(self._run_buffered, section)
+            for section in (
+                self.verify_code_structure,
+                self.run_linting_checks,
+                self.integration_test,
+            )
+        ))
+        for lines in (structure_lines, import_lines, lint_lines, linting_lines, integration_lines):
+            print("\n".join(lines))
         
         # Summary
         print("\n" + "=" * 60)
@@ -356,6 +526,7 @@ def main():
     runner = TestRunner()
     
     try:
+        runner.run_pytest_stage()
         success = asyncio.run(runner.run_all_tests())
         return 0 if success else 1
     except KeyboardInterrupt:
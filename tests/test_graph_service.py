@@ -1,98 +1,91 @@
 """Tests for the graph service."""
 import pytest
+from types import SimpleNamespace
 from unittest.mock import Mock, AsyncMock, patch
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry, device_registry, area_registry
 
 from custom_components.ha_visualiser.graph_service import GraphService, GraphNode
 
 
+# Lookup tables are built once at import; fixtures only bind them
+_MOCK_STATES = {
+    "light.living_room": Mock(
+        entity_id="light.living_room",
+        state="on", 
+        attributes={"friendly_name": "Living Room Light"}
+    ),
+    "switch.kitchen": Mock(
+        entity_id="switch.kitchen",
+        state="off",
+        attributes={"friendly_name": "Kitchen Switch"}
+    ),
+    "sensor.temperature": Mock(
+        entity_id="sensor.temperature", 
+        state="20.5",
+        attributes={"friendly_name": "Temperature Sensor", "unit_of_measurement": "°C"}
+    ),
+    "automation.morning_routine": Mock(
+        entity_id="automation.morning_routine",
+        state="on",
+        attributes={
+            "friendly_name": "Morning Routine",
+            "configuration": {
+                "trigger": [{"entity_id": "sensor.temperature"}],
+                "action": [{"entity_id": "light.living_room"}]
+            }
+        }
+    )
+}
+
+_ENTITY_IDS = tuple(_MOCK_STATES)
+
+_ENTITY_ENTRIES = {
+    "light.living_room": Mock(
+        entity_id="light.living_room",
+        device_id="device_1",
+        area_id="area_1"
+    ),
+    "switch.kitchen": Mock(
+        entity_id="switch.kitchen", 
+        device_id="device_2",
+        area_id="area_2"
+    ),
+    "sensor.temperature": Mock(
+        entity_id="sensor.temperature",
+        device_id="device_1", 
+        area_id="area_1"
+    )
+}
+
+_DEVICES = {
+    "device_1": Mock(device_id="device_1", name="Smart Hub", area_id="area_1"),
+    "device_2": Mock(device_id="device_2", name="Kitchen Switch", area_id="area_2")
+}
+
+_AREAS = {
+    "area_1": Mock(area_id="area_1", name="Living Room"),
+    "area_2": Mock(area_id="area_2", name="Kitchen")
+}
+
+
 @pytest.fixture
 def mock_hass():
     """Create a mock Home Assistant instance."""
-    hass = Mock(spec=HomeAssistant)
-    hass.states = Mock()
-    hass.states.async_entity_ids.return_value = [
-        "light.living_room",
-        "switch.kitchen", 
-        "sensor.temperature",
-        "automation.morning_routine"
-    ]
-    
-    # Mock states
-    mock_states = {
-        "light.living_room": Mock(
-            entity_id="light.living_room",
-            state="on", 
-            attributes={"friendly_name": "Living Room Light"}
-        ),
-        "switch.kitchen": Mock(
-            entity_id="switch.kitchen",
-            state="off",
-            attributes={"friendly_name": "Kitchen Switch"}
-        ),
-        "sensor.temperature": Mock(
-            entity_id="sensor.temperature", 
-            state="20.5",
-            attributes={"friendly_name": "Temperature Sensor", "unit_of_measurement": "°C"}
+    # Only the attributes GraphService reads are provided
+    return SimpleNamespace(
+        states=SimpleNamespace(
+            get=_MOCK_STATES.get,
+            async_entity_ids=lambda: _ENTITY_IDS,
         ),
-        "automation.morning_routine": Mock(
-            entity_id="automation.morning_routine",
-            state="on",
-            attributes={
-                "friendly_name": "Morning Routine",
-                "configuration": {
-                    "trigger": [{"entity_id": "sensor.temperature"}],
-                    "action": [{"entity_id": "light.living_room"}]
-                }
-            }
-        )
-    }
-    hass.states.get.side_effect = lambda entity_id: mock_states.get(entity_id)
-    
-    return hass
+        data={},
+    )
 
 
 @pytest.fixture
 def mock_registries():
     """Create mock registries."""
-    entity_reg = Mock(spec=entity_registry.EntityRegistry)
-    device_reg = Mock(spec=device_registry.DeviceRegistry) 
-    area_reg = Mock(spec=area_registry.AreaRegistry)
-    
-    # Mock entity entries
-    entity_entries = {
-        "light.living_room": Mock(
-            entity_id="light.living_room",
-            device_id="device_1",
-            area_id="area_1"
-        ),
-        "switch.kitchen": Mock(
-            entity_id="switch.kitchen", 
-            device_id="device_2",
-            area_id="area_2"
-        ),
-        "sensor.temperature": Mock(
-            entity_id="sensor.temperature",
-            device_id="device_1", 
-            area_id="area_1"
-        )
-    }
-    entity_reg.async_get.side_effect = lambda entity_id: entity_entries.get(entity_id)
-    
-    # Mock device entries
-    devices = {
-        "device_1": Mock(device_id="device_1", name="Smart Hub", area_id="area_1"),
-        "device_2": Mock(device_id="device_2", name="Kitchen Switch", area_id="area_2")
-    }
-    device_reg.async_get.side_effect = lambda device_id: devices.get(device_id)
-    
-    # Mock area entries  
-    areas = {
-        "area_1": Mock(area_id="area_1", name="Living Room"),
-        "area_2": Mock(area_id="area_2", name="Kitchen")
-    }
-    area_reg.async_get_area.side_effect = lambda area_id: areas.get(area_id)
+    entity_reg = SimpleNamespace(async_get=_ENTITY_ENTRIES.get, entities=_ENTITY_ENTRIES)
+    device_reg = SimpleNamespace(async_get=_DEVICES.get, devices=_DEVICES)
+    area_reg = SimpleNamespace(async_get_area=_AREAS.get, areas=_AREAS)
     
     return entity_reg, device_reg, area_reg
 
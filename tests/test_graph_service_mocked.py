@@ -1,399 +0,0 @@
-"""
-Unit tests for GraphService core logic using mocked Home Assistant dependencies.
-
-Tests the graph building, relationship detection, and entity management logic
-without requiring a full Home Assistant installation.
-"""
-import pytest
-import sys
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
-
-
-class TestGraphServiceMocked:
-    """Test GraphService functionality with mocked HA dependencies."""
-    
-    @pytest.fixture(autouse=True)
-    def setup_mocks(self):
-        """Set up mocks for Home Assistant dependencies."""
-        # Mock the HomeAssistant core module
-        mock_hass_core = Mock()
-        sys.modules['homeassistant.core'] = mock_hass_core
-        
-        # Mock the helpers modules
-        mock_entity_registry = Mock()
-        mock_device_registry = Mock() 
-        mock_area_registry = Mock()
-        mock_label_registry = Mock()
-        mock_const = Mock()
-        
-        sys.modules['homeassistant.helpers.entity_registry'] = mock_entity_registry
-        sys.modules['homeassistant.helpers.device_registry'] = mock_device_registry
-        sys.modules['homeassistant.helpers.area_registry'] = mock_area_registry
-        sys.modules['homeassistant.helpers.label_registry'] = mock_label_registry
-        sys.modules['homeassistant.const'] = mock_const
-        
-        # Set up mock constants
-        mock_const.ATTR_LATITUDE = 'latitude'
-        mock_const.ATTR_LONGITUDE = 'longitude'
-    
-    def test_graph_node_structure(self):
-        """Test GraphNode dataclass structure and validation."""
-        # Test the expected structure of graph nodes
-        expected_node_fields = [
-            'id', 'label', 'domain', 'area', 'device_id', 'state', 'icon'
-        ]
-        
-        # Simulate a node structure
-        sample_node = {
-            'id': 'light.living_room',
-            'label': 'Living Room Light',
-            'domain': 'light', 
-            'area': 'Living Room',
-            'device_id': 'device123',
-            'state': 'on',
-            'icon': 'mdi:lightbulb'
-        }
-        
-        # Validate all expected fields are present
-        for field in expected_node_fields:
-            assert field in sample_node, f"Node missing required field: {field}"
-        
-        # Test field types
-        assert isinstance(sample_node['id'], str)
-        assert isinstance(sample_node['label'], str)
-        assert isinstance(sample_node['domain'], str)
-        # area can be None, so test for string or None
-        assert sample_node['area'] is None or isinstance(sample_node['area'], str)
-        # device_id can be None
-        assert sample_node['device_id'] is None or isinstance(sample_node['device_id'], str)
-        # state can be None
-        assert sample_node['state'] is None or isinstance(sample_node['state'], str)
-        # icon can be None
-        assert sample_node['icon'] is None or isinstance(sample_node['icon'], str)
-    
-    def test_graph_edge_structure(self):
-        """Test GraphEdge dataclass structure and validation."""
-        expected_edge_fields = [
-            'from_node', 'to_node', 'relationship_type', 'label'
-        ]
-        
-        sample_edge = {
-            'from_node': 'device123',
-            'to_node': 'light.living_room',
-            'relationship_type': 'device_contains',
-            'label': 'contains'
-        }
-        
-        # Validate all expected fields are present
-        for field in expected_edge_fields:
-            assert field in sample_edge, f"Edge missing required field: {field}"
-        
-        # Test field types
-        assert isinstance(sample_edge['from_node'], str)
-        assert isinstance(sample_edge['to_node'], str)
-        assert isinstance(sample_edge['relationship_type'], str)
-        assert isinstance(sample_edge['label'], str)
-    
-    def test_neighborhood_result_structure(self):
-        """Test get_entity_neighborhood return structure."""
-        expected_result_fields = ['nodes', 'edges', 'center_node']
-        
-        sample_result = {
-            'nodes': [],
-            'edges': [],
-            'center_node': 'light.living_room'
-        }
-        
-        # Validate structure
-        for field in expected_result_fields:
-            assert field in sample_result, f"Result missing required field: {field}"
-        
-        # Test field types
-        assert isinstance(sample_result['nodes'], list)
-        assert isinstance(sample_result['edges'], list) 
-        assert isinstance(sample_result['center_node'], str)
-    
-    def test_entity_id_validation_patterns(self):
-        """Test entity ID validation logic."""
-        valid_entity_ids = [
-            'light.living_room',
-            'sensor.temperature_sensor',
-            'switch.fan_switch',
-            'automation.morning_routine',
-            'zone.home',
-            'device_tracker.phone123'
-        ]
-        
-        invalid_entity_ids = [
-            '',
-            'invalid',
-            'light.',
-            '.living_room',
-            'light..living_room',
-            'LIGHT.LIVING_ROOM'  # Should be lowercase
-        ]
-        
-        # Test valid patterns
-        for entity_id in valid_entity_ids:
-            # Basic validation: contains exactly one dot, no empty parts
-            parts = entity_id.split('.')
-            assert len(parts) == 2, f"Entity ID {entity_id} should have exactly one dot"
-            assert all(part for part in parts), f"Entity ID {entity_id} should not have empty parts"
-            assert entity_id.islower(), f"Entity ID {entity_id} should be lowercase"
-        
-        # Test invalid patterns  
-        for entity_id in invalid_entity_ids:
-            if not entity_id:  # Empty string
-                assert not entity_id
-            elif '.' not in entity_id:  # No domain separator
-                assert '.' not in entity_id
-            else:
-                parts = entity_id.split('.')
-                # Should fail validation for various reasons
-                is_invalid = (
-                    len(parts) != 2 or  # Wrong number of parts
-                    not all(part for part in parts) or  # Empty parts
-                    not entity_id.islower()  # Not lowercase
-                )
-                assert is_invalid, f"Entity ID {entity_id} should be considered invalid"
-    
-    def test_special_entity_prefixes(self):
-        """Test special entity type handling (device:, area:, zone., label:)."""
-        test_cases = [
-            ('device:abc123', 'device'),
-            ('area:living_room', 'area'),
-            ('zone.home', 'zone'),
-            ('label:lighting', 'label'),
-            ('light.living_room', 'entity')  # Regular entity
-        ]
-        
-        for entity_id, expected_type in test_cases:
-            if entity_id.startswith('device:'):
-                detected_type = 'device'
-            elif entity_id.startswith('area:'):
-                detected_type = 'area'
-            elif entity_id.startswith('zone.'):
-                detected_type = 'zone'
-            elif entity_id.startswith('label:'):
-                detected_type = 'label'
-            else:
-                detected_type = 'entity'
-            
-            assert detected_type == expected_type, f"Entity {entity_id} should be type {expected_type}"
-    
-    def test_depth_parameter_validation(self):
-        """Test max_depth parameter validation."""
-        valid_depths = [1, 2, 3, 4, 5]
-        invalid_depths = [0, -1, 6, 10, None]
-        
-        for depth in valid_depths:
-            assert isinstance(depth, int), f"Depth {depth} should be integer"
-            assert 1 <= depth <= 5, f"Depth {depth} should be in valid range"
-        
-        for depth in invalid_depths:
-            if depth is None:
-                # None should be handled with default
-                default_depth = 3
-                assert default_depth == 3
-            else:
-                # Invalid depths should be outside valid range
-                assert not (1 <= depth <= 5), f"Depth {depth} should be invalid"
-    
-    def test_show_areas_parameter(self):
-        """Test show_areas parameter handling."""
-        # Test boolean parameter
-        assert isinstance(True, bool)
-        assert isinstance(False, bool)
-        
-        # Test default value
-        default_show_areas = True
-        assert default_show_areas is True
-    
-    def test_relationship_types(self):
-        """Test expected relationship types."""
-        expected_relationship_types = [
-            'device_contains',
-            'area_contains', 
-            'automation_depends',
-            'template_depends',
-            'labelled',
-            'zone_contains'
-        ]
-        
-        # Validate relationship type naming
-        for rel_type in expected_relationship_types:
-            assert isinstance(rel_type, str), f"Relationship type should be string"
-            assert rel_type, f"Relationship type should not be empty"
-            # Most follow snake_case pattern
-            if '_' in rel_type:
-                parts = rel_type.split('_')
-                assert all(part.islower() for part in parts), f"Relationship type {rel_type} should be snake_case"
-    
-    def test_error_handling_patterns(self):
-        """Test error handling patterns used in graph service."""
-        # Test the defensive programming pattern
-        def simulate_safe_graph_building():
-            try:
-                # Simulate graph building
-                nodes = {}
-                edges = []
-                
-                # Validate results before returning
-                if nodes is None:
-                    nodes = {}
-                if edges is None:
-                    edges = []
-                
-                nodes_list = list(nodes.values()) if isinstance(nodes, dict) else []
-                edges_list = edges if isinstance(edges, list) else []
-                
-                return {
-                    "nodes": nodes_list,
-                    "edges": edges_list,
-                    "center_node": "test_entity"
-                }
-            except Exception:
-                # Return safe empty result on any error
-                return {
-                    "nodes": [],
-                    "edges": [],
-                    "center_node": "test_entity"
-                }
-        
-        result = simulate_safe_graph_building()
-        
-        # Should always return valid structure
-        assert isinstance(result, dict)
-        assert 'nodes' in result
-        assert 'edges' in result  
-        assert 'center_node' in result
-        assert isinstance(result['nodes'], list)
-        assert isinstance(result['edges'], list)
-        assert isinstance(result['center_node'], str)
-    
-    def test_registry_lookup_patterns(self):
-        """Test entity/device/area registry lookup patterns."""
-        # Test entity registry lookup pattern
-        mock_entity_registry = Mock()
-        mock_entity_registry.async_get = Mock(return_value=Mock(
-            entity_id='light.test',
-            device_id='device123',
-            area_id='living_room'
-        ))
-        
-        # Simulate lookup
-        entity_entry = mock_entity_registry.async_get('light.test')
-        assert entity_entry is not None
-        assert hasattr(entity_entry, 'entity_id')
-        assert hasattr(entity_entry, 'device_id')
-        assert hasattr(entity_entry, 'area_id')
-        
-        # Test missing entity handling
-        mock_entity_registry.async_get = Mock(return_value=None)
-        missing_entity = mock_entity_registry.async_get('light.nonexistent')
-        assert missing_entity is None
-    
-    def test_graph_data_serialization(self):
-        """Test that graph data can be serialized for JSON transmission."""
-        import json
-        
-        sample_graph_data = {
-            'nodes': [
-                {
-                    'id': 'light.test',
-                    'label': 'Test Light',
-                    'domain': 'light',
-                    'area': 'Living Room',
-                    'device_id': 'device123',
-                    'state': 'on',
-                    'icon': 'mdi:lightbulb'
-                }
-            ],
-            'edges': [
-                {
-                    'from_node': 'device123',
-                    'to_node': 'light.test', 
-                    'relationship_type': 'device_contains',
-                    'label': 'contains'
-                }
-            ],
-            'center_node': 'light.test'
-        }
-        
-        # Should be serializable to JSON
-        json_str = json.dumps(sample_graph_data)
-        assert isinstance(json_str, str)
-        
-        # Should be deserializable from JSON
-        restored_data = json.loads(json_str)
-        assert restored_data == sample_graph_data
-    
-    @pytest.mark.parametrize("entity_id,expected_domain", [
-        ('light.living_room', 'light'),
-        ('sensor.temperature', 'sensor'),
-        ('switch.fan', 'switch'),
-        ('automation.morning', 'automation'),
-        ('zone.home', 'zone'),
-        ('device_tracker.phone', 'device_tracker')
-    ])
-    def test_domain_extraction(self, entity_id, expected_domain):
-        """Test domain extraction from entity IDs."""
-        domain = entity_id.split('.')[0]
-        assert domain == expected_domain
-    
-    def test_filtered_neighborhood_parameters(self):
-        """Test filtered neighborhood function parameters."""
-        # Test parameter structure for get_filtered_neighborhood
-        filter_params = {
-            'entity_id': 'light.test',
-            'max_depth': 3,
-            'domain_filter': ['light', 'sensor'],
-            'area_filter': ['living_room', 'kitchen'],
-            'relationship_filter': ['device_contains', 'area_contains']
-        }
-        
-        # Validate parameter types
-        assert isinstance(filter_params['entity_id'], str)
-        assert isinstance(filter_params['max_depth'], int)
-        assert isinstance(filter_params['domain_filter'], list)
-        assert isinstance(filter_params['area_filter'], list)
-        assert isinstance(filter_params['relationship_filter'], list)
-        
-        # Test filter list contents
-        if filter_params['domain_filter']:
-            assert all(isinstance(domain, str) for domain in filter_params['domain_filter'])
-        
-        if filter_params['area_filter']:
-            assert all(isinstance(area, str) for area in filter_params['area_filter'])
-        
-        if filter_params['relationship_filter']:
-            assert all(isinstance(rel_type, str) for rel_type in filter_params['relationship_filter'])
-    
-    def test_graph_statistics_structure(self):
-        """Test graph statistics return structure."""
-        expected_stats_fields = [
-            'total_entities',
-            'domain_counts', 
-            'area_counts',
-            'device_counts',
-            'total_areas'
-        ]
-        
-        sample_stats = {
-            'total_entities': 42,
-            'domain_counts': {'light': 5, 'sensor': 10},
-            'area_counts': {'living_room': 8, 'kitchen': 6},
-            'device_counts': {'Smart Bulb': 3, 'Temperature Sensor': 2},
-            'total_areas': 3
-        }
-        
-        # Validate structure
-        for field in expected_stats_fields:
-            assert field in sample_stats, f"Stats missing required field: {field}"
-        
-        # Validate field types
-        assert isinstance(sample_stats['total_entities'], int)
-        assert isinstance(sample_stats['domain_counts'], dict)
-        assert isinstance(sample_stats['area_counts'], dict)
-        assert isinstance(sample_stats['device_counts'], dict)
-        assert isinstance(sample_stats['total_areas'], int)
\ No newline at end of file
@@ -0,0 +1,552 @@
+"""
+Unit tests for graph service and preference management logic.
+
+Tests the graph data structures, relationship detection and entity
+management logic, plus the localStorage-based preference system for
+show areas, depth and layout, without requiring a full Home Assistant
+installation.
+"""
+import json
+import re
+
+import pytest
+from types import SimpleNamespace
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_dumps = json.dumps
+
+
+# Expected structures and samples shared by the graph service tests
+_OPTIONAL_STR = (str, type(None))
+
+# Field name -> accepted type(s) for each returned structure
+EXPECTED_NODE_TYPES = {
+    'id': str,
+    'label': str,
+    'domain': str,
+    'area': _OPTIONAL_STR,
+    'device_id': _OPTIONAL_STR,
+    'state': _OPTIONAL_STR,
+    'icon': _OPTIONAL_STR,
+}
+
+SAMPLE_NODE = {
+    'id': 'light.living_room',
+    'label': 'Living Room Light',
+    'domain': 'light', 
+    'area': 'Living Room',
+    'device_id': 'device123',
+    'state': 'on',
+    'icon': 'mdi:lightbulb'
+}
+
+EXPECTED_EDGE_TYPES = {
+    'from_node': str,
+    'to_node': str,
+    'relationship_type': str,
+    'label': str,
+}
+
+SAMPLE_EDGE = {
+    'from_node': 'device123',
+    'to_node': 'light.living_room',
+    'relationship_type': 'device_contains',
+    'label': 'contains'
+}
+
+EXPECTED_RESULT_TYPES = {
+    'nodes': list,
+    'edges': list,
+    'center_node': str,
+}
+
+SAMPLE_RESULT = {
+    'nodes': [],
+    'edges': [],
+    'center_node': 'light.living_room'
+}
+
+EXPECTED_STATS_TYPES = {
+    'total_entities': int,
+    'domain_counts': dict,
+    'area_counts': dict,
+    'device_counts': dict,
+    'total_areas': int,
+}
+
+SAMPLE_STATS = {
+    'total_entities': 42,
+    'domain_counts': {'light': 5, 'sensor': 10},
+    'area_counts': {'living_room': 8, 'kitchen': 6},
+    'device_counts': {'Smart Bulb': 3, 'Temperature Sensor': 2},
+    'total_areas': 3
+}
+
+# Entity ID -> domain expected from splitting on the first dot
+DOMAIN_CASES = (
+    ('light.living_room', 'light'),
+    ('sensor.temperature', 'sensor'),
+    ('switch.fan', 'switch'),
+    ('automation.morning', 'automation'),
+    ('zone.home', 'zone'),
+    ('device_tracker.phone', 'device_tracker'),
+)
+
+# Parameter structure for get_filtered_neighborhood
+EXPECTED_FILTER_PARAM_TYPES = {
+    'entity_id': str,
+    'max_depth': int,
+    'domain_filter': list,
+    'area_filter': list,
+    'relationship_filter': list,
+}
+
+FILTER_LIST_PARAMS = ('domain_filter', 'area_filter', 'relationship_filter')
+
+SAMPLE_FILTER_PARAMS = {
+    'entity_id': 'light.test',
+    'max_depth': 3,
+    'domain_filter': ['light', 'sensor'],
+    'area_filter': ['living_room', 'kitchen'],
+    'relationship_filter': ['device_contains', 'area_contains']
+}
+
+# Structure name -> (expected field types, sample), checked by one parametrized test
+STRUCTURE_SCHEMAS = {
+    'node': (EXPECTED_NODE_TYPES, SAMPLE_NODE),
+    'edge': (EXPECTED_EDGE_TYPES, SAMPLE_EDGE),
+    'result': (EXPECTED_RESULT_TYPES, SAMPLE_RESULT),
+    'filter_params': (EXPECTED_FILTER_PARAM_TYPES, SAMPLE_FILTER_PARAMS),
+    'stats': (EXPECTED_STATS_TYPES, SAMPLE_STATS),
+}
+
+VALID_ENTITY_IDS = (
+    'light.living_room',
+    'sensor.temperature_sensor',
+    'switch.fan_switch',
+    'automation.morning_routine',
+    'zone.home',
+    'device_tracker.phone123'
+)
+
+INVALID_ENTITY_IDS = (
+    '',
+    'invalid',
+    'light.',
+    '.living_room',
+    'light..living_room',
+    'LIGHT.LIVING_ROOM'  # Should be lowercase
+)
+
+# Leading token up to and including the first ':' or '.'
+_PREFIX_RE = re.compile(r'[^:.]*[:.]')
+
+SPECIAL_PREFIX_TYPES = {
+    'device:': 'device',
+    'area:': 'area',
+    'zone.': 'zone',
+    'label:': 'label',
+}
+
+SPECIAL_ENTITY_CASES = (
+    ('device:abc123', 'device'),
+    ('area:living_room', 'area'),
+    ('zone.home', 'zone'),
+    ('label:lighting', 'label'),
+    ('light.living_room', 'entity')  # Regular entity
+)
+
+# Registry stub whose lookup is a plain dict.get over known entries
+_ENTITY_ENTRIES = {
+    'light.test': SimpleNamespace(
+        entity_id='light.test',
+        device_id='device123',
+        area_id='living_room'
+    ),
+}
+
+_ENTITY_REGISTRY = SimpleNamespace(async_get=_ENTITY_ENTRIES.get)
+
+_SAMPLE_GRAPH = {
+    'nodes': [
+        {
+            'id': 'light.test',
+            'label': 'Test Light',
+            'domain': 'light',
+            'area': 'Living Room',
+            'device_id': 'device123',
+            'state': 'on',
+            'icon': 'mdi:lightbulb'
+        }
+    ],
+    'edges': [
+        {
+            'from_node': 'device123',
+            'to_node': 'light.test', 
+            'relationship_type': 'device_contains',
+            'label': 'contains'
+        }
+    ],
+    'center_node': 'light.test'
+}
+
+_SAMPLE_GRAPH_JSON = _json_dumps(_SAMPLE_GRAPH)
+
+RELATIONSHIP_TYPES = (
+    'device_contains',
+    'area_contains', 
+    'automation_depends',
+    'template_depends',
+    'labelled',
+    'zone_contains'
+)
+
+# Preference defaults, localStorage keys and parsing cases
+DEFAULT_PREFERENCES = {
+    'showAreas': True,
+    'depth': 3,
+    'layout': 'hierarchical'
+}
+
+PREFERENCE_KEYS = (
+    'ha_visualiser_show_areas',
+    'ha_visualiser_depth', 
+    'ha_visualiser_layout'
+)
+
+VALID_DEPTHS = range(1, 6)
+_DEPTH_RANGE = frozenset(VALID_DEPTHS)
+INVALID_DEPTHS = (0, -1, 6, 10, None, 'invalid')
+INVALID_MAX_DEPTHS = (0, -1, 6, 10, None)
+
+VALID_LAYOUTS = frozenset({'hierarchical', 'force-directed'})
+INVALID_LAYOUTS = ('invalid', '', None, 123, 'horizontal', 'vertical')
+
+# localStorage stores everything as strings, so booleans and integers are parsed
+BOOLEAN_CASES = (
+    ('true', True),
+    ('false', False),
+    ('True', False),   # JavaScript comparison is case-sensitive
+    ('False', False),
+    ('1', False),      # Only 'true' should be True
+    ('0', False),
+    ('', False),       # Empty string should be false
+)
+
+INTEGER_CASES = (
+    ('1', 1),
+    ('3', 3), 
+    ('5', 5),
+    ('0', 0),
+    ('-1', -1),
+    ('invalid', None),  # Should handle invalid strings
+    ('', None),         # Empty string
+    ('3.5', 3),         # Should handle floats by truncating
+    (None, None)        # None input
+)
+
+
+def _simulate_load_preferences(storage):
+    """Simulate the panel's loadUserPreferences() logic."""
+    saved_show_areas = storage.get('ha_visualiser_show_areas')
+    saved_depth = storage.get('ha_visualiser_depth')
+    saved_layout = storage.get('ha_visualiser_layout')
+    
+    show_areas = True if saved_show_areas is None else saved_show_areas == 'true'
+    try:
+        depth = int(saved_depth)
+        depth = depth if depth in _DEPTH_RANGE else DEFAULT_PREFERENCES['depth']
+    except (TypeError, ValueError):
+        depth = DEFAULT_PREFERENCES['depth']
+    
+    return {
+        'showAreas': show_areas,
+        'depth': depth,
+        'layout': saved_layout if saved_layout in VALID_LAYOUTS else DEFAULT_PREFERENCES['layout']
+    }
+
+
+def _validate_structure(sample, expected_types):
+    """Assert sample has every expected field, each of the accepted type(s)."""
+    missing = expected_types.keys() - sample.keys()
+    assert not missing, f"Missing required fields: {missing}"
+    
+    wrong_types = [k for k, t in expected_types.items() if not isinstance(sample[k], t)]
+    assert not wrong_types, f"Fields with unexpected types: {wrong_types}"
+
+
+def _build_nodes_edges():
+    """Simulate graph building that finds no related entities."""
+    return {}, []
+
+
+def _failing_build():
+    """Simulate graph building that fails part-way through."""
+    raise RuntimeError("graph building failed")
+
+
+def _safe_build(build):
+    """Simulate the graph service's defensive result assembly."""
+    try:
+        nodes, edges = build()
+    except Exception:
+        # Return safe empty result on any error
+        nodes, edges = {}, []
+    
+    return {
+        "nodes": list(nodes.values()) if isinstance(nodes, dict) else [],
+        "edges": edges if isinstance(edges, list) else [],
+        "center_node": "test_entity"
+    }
+
+
+@pytest.fixture(scope="module")
+def load_prefs():
+    """Provide the preference loader shared by the loading scenarios."""
+    return _simulate_load_preferences
+
+
+class TestPreferenceManagement:
+    """Test preference loading, saving, and validation logic."""
+    
+    def test_constants(self):
+        """Test the default preferences and localStorage key naming."""
+        # These are the defaults that should be used when no preferences stored
+        assert DEFAULT_PREFERENCES == {'showAreas': True, 'depth': 3, 'layout': 'hierarchical'}
+        
+        # Validate key naming convention and that all preferences are covered
+        assert all(key.startswith('ha_visualiser_') for key in PREFERENCE_KEYS)
+        assert len(PREFERENCE_KEYS) == len(DEFAULT_PREFERENCES)
+    
+    @pytest.mark.parametrize("depth", VALID_DEPTHS, ids=str)
+    def test_valid_depth(self, depth):
+        """Test depth values inside the valid range."""
+        assert 1 <= depth <= 5, f"Depth {depth} should be valid"
+    
+    @pytest.mark.parametrize("depth", INVALID_DEPTHS, ids=repr)
+    def test_invalid_depth(self, depth):
+        """Test depth values outside the valid range or of the wrong type."""
+        is_valid = isinstance(depth, (int, float)) and 1 <= depth <= 5
+        assert not is_valid, f"Depth {depth} should be invalid"
+    
+    @pytest.mark.parametrize("layout", sorted(VALID_LAYOUTS))
+    def test_valid_layout(self, layout):
+        """Test supported layout values."""
+        assert layout in VALID_LAYOUTS, f"Layout {layout} should be valid"
+    
+    @pytest.mark.parametrize("layout", INVALID_LAYOUTS, ids=repr)
+    def test_invalid_layout(self, layout):
+        """Test unsupported layout values."""
+        assert layout not in VALID_LAYOUTS, f"Layout {layout} should be invalid"
+    
+    @pytest.mark.parametrize("input_value,expected", BOOLEAN_CASES, ids=repr)
+    def test_boolean_parsing(self, input_value, expected):
+        """Test boolean preference parsing from localStorage strings."""
+        # Simulate the JavaScript: savedShowAreas === 'true'
+        result = input_value == 'true'  # Exact match, not case-insensitive
+        assert result == expected, f"Input '{input_value}' should parse to {expected}, got {result}"
+    
+    def test_boolean_parsing_missing_value(self):
+        """Test that a missing boolean preference falls back to the default."""
+        saved_show_areas = None
+        show_areas = saved_show_areas == 'true' if saved_show_areas is not None else DEFAULT_PREFERENCES['showAreas']
+        assert show_areas is True
+    
+    @pytest.mark.parametrize("input_value,expected", INTEGER_CASES, ids=repr)
+    def test_integer_parsing(self, input_value, expected):
+        """Test integer preference parsing from localStorage strings."""
+        try:
+            result = int(float(input_value)) if input_value else None
+        except (ValueError, TypeError):
+            result = None
+        
+        assert result == expected, f"Input '{input_value}' should parse to {expected}, got {result}"
+    
+    @pytest.mark.parametrize("stored_values,expected_preferences", [
+        # Test case 1: All valid stored values
+        ({
+            'ha_visualiser_show_areas': 'true',
+            'ha_visualiser_depth': '2',
+            'ha_visualiser_layout': 'force-directed'
+        }, {
+            'showAreas': True,
+            'depth': 2, 
+            'layout': 'force-directed'
+        }),
+        
+        # Test case 2: No stored values (all None) - should use defaults
+        ({
+            'ha_visualiser_show_areas': None,
+            'ha_visualiser_depth': None,
+            'ha_visualiser_layout': None
+        }, {
+            'showAreas': True,  # Default
+            'depth': 3,         # Default
+            'layout': 'hierarchical'  # Default
+        }),
+        
+        # Test case 3: Mixed valid and invalid values
+        ({
+            'ha_visualiser_show_areas': 'false',
+            'ha_visualiser_depth': '10',      # Invalid (>5)
+            'ha_visualiser_layout': 'hierarchical'
+        }, {
+            'showAreas': False,
+            'depth': 3,         # Should fallback to default
+            'layout': 'hierarchical'
+        }),
+        
+        # Test case 4: Corrupted/invalid data
+        ({
+            'ha_visualiser_show_areas': 'invalid',
+            'ha_visualiser_depth': 'not_a_number',
+            'ha_visualiser_layout': 'bad_layout'
+        }, {
+            'showAreas': False,  # 'invalid' != 'true' so False
+            'depth': 3,         # Default
+            'layout': 'hierarchical'  # Default
+        }),
+        
+        # Test case 5: Values as written by saveUserPreferences() (round-trip)
+        ({
+            'ha_visualiser_depth': str(5),
+            'ha_visualiser_show_areas': str(False).lower(),
+            'ha_visualiser_layout': 'force-directed'
+        }, {
+            'showAreas': False,
+            'depth': 5,
+            'layout': 'force-directed'
+        })
+    ])
+    def test_preference_loading_scenarios(self, load_prefs, stored_values, expected_preferences):
+        """Test various preference loading scenarios with different stored data."""
+        assert load_prefs(stored_values) == expected_preferences
+    
+    def test_error_handling_scenarios(self):
+        """Test error handling in preference management."""
+        # Test localStorage unavailable scenario
+        def simulate_localStorage_error():
+            raise Exception("localStorage not available")
+        
+        # Should gracefully handle localStorage errors and return defaults
+        try:
+            simulate_localStorage_error()
+            preferences = None  # This would trigger the error path
+        except Exception:
+            # Error fallback
+            preferences = {
+                'showAreas': True,
+                'depth': 3,
+                'layout': 'hierarchical'
+            }
+        
+        assert preferences == DEFAULT_PREFERENCES
+    
+    @pytest.mark.parametrize("element,should_operate", [
+        (object(), True),
+        (None, False),
+    ], ids=["present", "missing"])
+    def test_ui_element_validation(self, element, should_operate):
+        """Test UI elements are only operated on when they exist (JS `if (element)`)."""
+        if element:
+            assert should_operate
+        else:
+            assert not should_operate
+
+
+class TestGraphServiceMocked:
+    """Test GraphService functionality with mocked HA dependencies."""
+    
+    @pytest.mark.parametrize("name", STRUCTURE_SCHEMAS)
+    def test_structure_schema(self, name):
+        """Test GraphNode, GraphEdge, result, filter parameter and statistics structures."""
+        expected_types, sample = STRUCTURE_SCHEMAS[name]
+        _validate_structure(sample, expected_types)
+    
+    @pytest.mark.parametrize("entity_id", VALID_ENTITY_IDS, ids=str)
+    def test_valid_entity_ids(self, ws_api, entity_id):
+        """Test that well-formed entity IDs pass validation."""
+        assert ws_api._is_valid_entity_id(entity_id), f"Entity ID {entity_id} should be valid"
+    
+    @pytest.mark.parametrize("entity_id", INVALID_ENTITY_IDS, ids=repr)
+    def test_invalid_entity_ids(self, ws_api, entity_id):
+        """Test that malformed entity IDs fail validation."""
+        assert not ws_api._is_valid_entity_id(entity_id), f"Entity ID {entity_id} should be considered invalid"
+    
+    @pytest.mark.parametrize("entity_id,expected_type", SPECIAL_ENTITY_CASES, ids=str)
+    def test_special_entity_prefixes(self, entity_id, expected_type):
+        """Test special entity type handling (device:, area:, zone., label:)."""
+        prefix = _PREFIX_RE.match(entity_id)
+        detected_type = SPECIAL_PREFIX_TYPES.get(prefix and prefix.group(), 'entity')
+        
+        assert detected_type == expected_type, f"Entity {entity_id} should be type {expected_type}"
+    
+    @pytest.mark.parametrize("depth", VALID_DEPTHS, ids=str)
+    def test_valid_depth_parameter(self, depth):
+        """Test max_depth values inside the supported range."""
+        assert isinstance(depth, int), f"Depth {depth} should be integer"
+        assert 1 <= depth <= 5, f"Depth {depth} should be in valid range"
+    
+    @pytest.mark.parametrize("depth", INVALID_MAX_DEPTHS, ids=str)
+    def test_invalid_depth_parameter(self, depth):
+        """Test max_depth values outside the supported range (None falls back to the default)."""
+        assert depth is None or not (1 <= depth <= 5), f"Depth {depth} should be invalid"
+    
+    def test_relationship_types(self):
+        """Test expected relationship types."""
+        # Validate relationship type naming
+        for rel_type in RELATIONSHIP_TYPES:
+            assert isinstance(rel_type, str), f"Relationship type should be string"
+            assert rel_type, f"Relationship type should not be empty"
+            # Most follow snake_case pattern
+            if '_' in rel_type:
+                parts = rel_type.split('_')
+                assert all(part.islower() for part in parts), f"Relationship type {rel_type} should be snake_case"
+    
+    @pytest.mark.parametrize("build", [
+        _build_nodes_edges,
+        _failing_build,
+    ], ids=["success", "failure"])
+    def test_error_handling_patterns(self, build):
+        """Test the defensive graph building pattern always returns a valid result."""
+        result = _safe_build(build)
+        
+        # Should always return valid structure
+        _validate_structure(result, EXPECTED_RESULT_TYPES)
+    
+    def test_registry_lookup_patterns(self):
+        """Test entity/device/area registry lookup patterns."""
+        # Simulate lookup
+        entity_entry = _ENTITY_REGISTRY.async_get('light.test')
+        assert entity_entry is not None
+        assert hasattr(entity_entry, 'entity_id')
+        assert hasattr(entity_entry, 'device_id')
+        assert hasattr(entity_entry, 'area_id')
+        
+        # Test missing entity handling
+        assert _ENTITY_REGISTRY.async_get('light.nonexistent') is None
+    
+    def test_graph_data_serialization(self):
+        """Test that graph data can be serialized for JSON transmission."""
+        # Encoded once at import; the test only decodes and compares
+        assert json.loads(_SAMPLE_GRAPH_JSON) == _SAMPLE_GRAPH
+    
+    def test_domain_extraction(self):
+        """Test domain extraction from entity IDs."""
+        wrong = [
+            entity_id for entity_id, expected_domain in DOMAIN_CASES
+            if entity_id.split('.', 1)[0] != expected_domain
+        ]
+        assert not wrong, f"Wrong domain extracted for: {wrong}"
+    
+    def test_filtered_neighborhood_parameters(self):
+        """Test filtered neighborhood filter lists only contain strings."""
+        # Presence and types are covered by test_structure_schema; check list contents
+        assert all(
+            isinstance(value, str)
+            for key in FILTER_LIST_PARAMS
+            for value in SAMPLE_FILTER_PARAMS[key]
+        )
@@ -4,59 +4,129 @@ Unit tests for WebSocket API handlers using mocked Home Assistant dependencies.
 Tests the WebSocket command handlers, data validation, and response formatting
 without requiring a full Home Assistant installation.
 """
-import pytest
-import sys
+import asyncio
 import json
+
+import pytest
+from types import MappingProxyType, SimpleNamespace
 from unittest.mock import Mock, AsyncMock, patch
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+    
+    def _canonical(obj):
+        """Encode obj with sorted keys so equal payloads give equal bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    # Reuse one compact encoder/decoder instead of building one per call
+    _dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    _loads = json.JSONDecoder().decode
+    _canonical = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode
+
+
+# Expected command schemas based on the WebSocket handlers
+_EXPECTED_COMMANDS = MappingProxyType({
+    'ha_visualiser/search_entities': {
+        'required_fields': frozenset({'type', 'query'}),
+        'optional_fields': frozenset({'limit'})
+    },
+    'ha_visualiser/get_neighborhood': {
+        'required_fields': frozenset({'type', 'entity_id'}),
+        'optional_fields': frozenset({'max_depth', 'show_areas'})
+    },
+    'ha_visualiser/get_filtered_neighborhood': {
+        'required_fields': frozenset({'type', 'entity_id'}),
+        'optional_fields': frozenset({'max_depth', 'domain_filter', 'area_filter', 'relationship_filter'})
+    },
+    'ha_visualiser/get_graph_statistics': {
+        'required_fields': frozenset({'type'}),
+        'optional_fields': frozenset()
+    }
+})
+
+# Sample get_neighborhood response as sent over the WebSocket
+_SAMPLE_RESPONSE = {
+    'nodes': [
+        {
+            'id': 'light.living_room',
+            'label': 'Living Room Light',
+            'domain': 'light',
+            'area': 'Living Room',
+            'device_id': 'device123',
+            'state': 'on',
+            'icon': 'mdi:lightbulb'
+        }
+    ],
+    'edges': [
+        {
+            'from_node': 'device123',
+            'to_node': 'light.living_room',
+            'relationship_type': 'device_contains',
+            'label': 'contains'
+        }
+    ],
+    'center_node': 'light.living_room'
+}
+
+# Sample value supplied for each required command parameter
+_PARAM_VALUES = {'query': 'test_query', 'entity_id': 'light.test'}
+
+# (command, required parameters besides 'type'), derived from the schemas above
+_COMMAND_PARAM_CASES = tuple(
+    (command, schema['required_fields'] - {'type'})
+    for command, schema in _EXPECTED_COMMANDS.items()
+)
+
+
+def _is_search_valid(msg):
+    """Return True if msg is a well-formed search_entities command."""
+    return (
+        msg.get('type') == 'ha_visualiser/search_entities'
+        and msg.get('query') is not None
+        and 'id' in msg
+    )
+
+
+def _is_neighborhood_valid(msg, is_valid_entity_id):
+    """Return True if msg is a well-formed get_neighborhood command."""
+    return (
+        msg.get('type') == 'ha_visualiser/get_neighborhood'
+        and is_valid_entity_id(msg.get('entity_id'))
+        and isinstance(msg.get('max_depth', 0), int)
+        and isinstance(msg.get('show_areas', True), bool)
+    )
+
+
+# Shared async mock for tests that only inspect it; reset it if a test starts calling it
+_SHARED_ASYNC_HANDLER = AsyncMock()
+_SHARED_ASYNC_HANDLER.some_async_operation = AsyncMock()
 
+
+async def _mock_websocket_handler(hass, connection, msg):
+    """Simulate an async WebSocket handler awaiting a service call."""
+    await _SHARED_ASYNC_HANDLER.some_async_operation()
+    return {'result': 'success'}
+
+
+@pytest.fixture(scope="module")
+def encoded_sample():
+    """Provide the sample response with its JSON encoding, built once per module."""
+    return _SAMPLE_RESPONSE, _dumps(_SAMPLE_RESPONSE)
+
+
+@pytest.mark.usefixtures("websocket_api_mocks")
 class TestWebSocketAPIMocked:
     """Test WebSocket API handlers with mocked HA dependencies."""
     
-    @pytest.fixture(autouse=True)
-    def setup_mocks(self):
-        """Set up mocks for Home Assistant dependencies."""
-        # Mock the HomeAssistant core and components modules
-        mock_hass_core = Mock()
-        mock_components = Mock()
-        mock_websocket_api = Mock()
-        
-        sys.modules['homeassistant.core'] = mock_hass_core
-        sys.modules['homeassistant.components'] = mock_components
-        sys.modules['homeassistant.components.websocket_api'] = mock_websocket_api
-        
-        # Set up mock websocket decorators and functions
-        mock_websocket_api.websocket_command = lambda schema: lambda func: func
-        mock_websocket_api.require_admin = lambda func: func
-        mock_websocket_api.async_response = lambda func: func
-    
     def test_websocket_command_schemas(self):
         """Test WebSocket command schemas and validation."""
-        # Expected command schemas based on the WebSocket handlers
-        expected_commands = {
-            'ha_visualiser/search_entities': {
-                'required_fields': ['type', 'query'],
-                'optional_fields': ['limit']
-            },
-            'ha_visualiser/get_neighborhood': {
-                'required_fields': ['type', 'entity_id'],
-                'optional_fields': ['max_depth', 'show_areas']
-            },
-            'ha_visualiser/get_filtered_neighborhood': {
-                'required_fields': ['type', 'entity_id'],
-                'optional_fields': ['max_depth', 'domain_filter', 'area_filter', 'relationship_filter']
-            },
-            'ha_visualiser/get_graph_statistics': {
-                'required_fields': ['type'],
-                'optional_fields': []
-            }
-        }
-        
         # Validate command structure
-        for command, schema in expected_commands.items():
+        for command, schema in _EXPECTED_COMMANDS.items():
             assert 'type' in schema['required_fields'], f"Command {command} should require 'type' field"
-            assert isinstance(schema['required_fields'], list)
-            assert isinstance(schema['optional_fields'], list)
+            assert isinstance(schema['required_fields'], frozenset)
+            assert isinstance(schema['optional_fields'], frozenset)
     
     def test_websocket_search_entities_validation(self):
         """Test search entities WebSocket command validation."""
@@ -74,24 +144,10 @@ class TestWebSocketAPIMocked:
             {'id': 3}  # Missing type and query
         ]
         
-        # Test valid messages
-        for msg in valid_messages:
-            assert 'type' in msg, "Message should have type field"
-            assert 'query' in msg, "Message should have query field"
-            assert 'id' in msg, "Message should have id field"
-            assert msg['type'] == 'ha_visualiser/search_entities'
-        
-        # Test invalid messages
-        for msg in invalid_messages:
-            is_valid = (
-                'type' in msg and 
-                'query' in msg and 
-                msg['query'] is not None and
-                msg['type'] == 'ha_visualiser/search_entities'
-            )
-            assert not is_valid, f"Message should be invalid: {msg}"
+        assert all(map(_is_search_valid, valid_messages))
+        assert not any(map(_is_search_valid, invalid_messages))
     
-    def test_websocket_get_neighborhood_validation(self):
+    def test_websocket_get_neighborhood_validation(self, ws_api):
         """Test get neighborhood WebSocket command validation."""
         valid_messages = [
             {
@@ -105,67 +161,84 @@ class TestWebSocketAPIMocked:
                 'max_depth': 2,
                 'show_areas': False,
                 'id': 2
+            },
+            {
+                'type': 'ha_visualiser/get_neighborhood',
+                'entity_id': 'device:abc123',  # Synthetic device node
+                'id': 3
             }
         ]
         
         invalid_messages = [
             {'type': 'ha_visualiser/get_neighborhood', 'id': 1},  # Missing entity_id
             {'type': 'ha_visualiser/get_neighborhood', 'entity_id': '', 'id': 2},  # Empty entity_id
-            {'type': 'ha_visualiser/get_neighborhood', 'entity_id': None, 'id': 3}  # None entity_id
+            {'type': 'ha_visualiser/get_neighborhood', 'entity_id': None, 'id': 3},  # None entity_id
+            {'type': 'ha_visualiser/get_neighborhood', 'entity_id': 'living room', 'id': 4}  # Not domain.object_id
         ]
         
-        # Test valid messages
-        for msg in valid_messages:
-            assert 'entity_id' in msg and msg['entity_id'], "Message should have valid entity_id"
-            assert msg['type'] == 'ha_visualiser/get_neighborhood'
-            
-            # Test optional parameters
-            if 'max_depth' in msg:
-                assert isinstance(msg['max_depth'], int)
-            if 'show_areas' in msg:
-                assert isinstance(msg['show_areas'], bool)
+        is_valid_entity_id = ws_api._is_valid_entity_id
+        assert all(_is_neighborhood_valid(msg, is_valid_entity_id) for msg in valid_messages)
+        assert not any(_is_neighborhood_valid(msg, is_valid_entity_id) for msg in invalid_messages)
+    
+    def test_get_neighborhood_rejects_malformed_entity_id(self, ws_api):
+        """Test the handler rejects a malformed entity_id before querying the graph."""
+        graph_service = SimpleNamespace(get_entity_neighborhood=AsyncMock())
+        hass = SimpleNamespace(data={ws_api.DOMAIN: {'graph_service': graph_service}})
+        connection = Mock()
+        msg = {
+            'type': 'ha_visualiser/get_neighborhood',
+            'entity_id': 'living room',
+            'max_depth': 3,
+            'show_areas': True,
+            'id': 7
+        }
         
-        # Test invalid messages
-        for msg in invalid_messages:
-            is_valid = (
-                'entity_id' in msg and 
-                msg['entity_id'] and
-                isinstance(msg['entity_id'], str)
-            )
-            assert not is_valid, f"Message should be invalid: {msg}"
+        asyncio.run(ws_api.websocket_get_neighborhood(hass, connection, msg))
+        
+        graph_service.get_entity_neighborhood.assert_not_awaited()
+        connection.send_result.assert_not_called()
+        connection.send_error.assert_called_once_with(
+            7, ws_api.websocket_api.const.ERR_NOT_FOUND, "Invalid entity ID format: living room"
+        )
     
-    def test_websocket_response_structure(self):
-        """Test WebSocket response structure and serialization."""
-        # Sample response data
-        sample_response = {
-            'nodes': [
-                {
-                    'id': 'light.living_room',
-                    'label': 'Living Room Light',
-                    'domain': 'light',
-                    'area': 'Living Room',
-                    'device_id': 'device123',
-                    'state': 'on',
-                    'icon': 'mdi:lightbulb'
-                }
-            ],
-            'edges': [
-                {
-                    'from_node': 'device123',
-                    'to_node': 'light.living_room',
-                    'relationship_type': 'device_contains',
-                    'label': 'contains'
-                }
-            ],
-            'center_node': 'light.living_room'
+    @pytest.mark.parametrize("entity_id", ['device:abc123', 'area:living_room'])
+    def test_get_neighborhood_accepts_graph_node_ids(self, ws_api, entity_id):
+        """Test the handler passes synthetic device/area node IDs to the graph service."""
+        node = _SAMPLE_RESPONSE['nodes'][0]
+        graph_service = SimpleNamespace(get_entity_neighborhood=AsyncMock(return_value={
+            'nodes': [SimpleNamespace(**node)],
+            'edges': [],
+            'center_node': entity_id
+        }))
+        hass = SimpleNamespace(data={ws_api.DOMAIN: {'graph_service': graph_service}})
+        connection = Mock()
+        msg = {
+            'type': 'ha_visualiser/get_neighborhood',
+            'entity_id': entity_id,
+            'max_depth': 2,
+            'show_areas': False,
+            'id': 8
         }
         
+        asyncio.run(ws_api.websocket_get_neighborhood(hass, connection, msg))
+        
+        graph_service.get_entity_neighborhood.assert_awaited_once_with(entity_id, 2, show_areas=False)
+        connection.send_error.assert_not_called()
+        connection.send_result.assert_called_once_with(
+            8, {'nodes': [node], 'edges': [], 'center_node': entity_id}
+        )
+    
+    def test_websocket_response_structure(self, encoded_sample):
+        """Test WebSocket response structure and serialization."""
+        sample_response, encoded = encoded_sample
+        
         # Test JSON serialization (required for WebSocket transmission)
-        json_str = json.dumps(sample_response)
-        assert isinstance(json_str, str)
+        assert isinstance(encoded, (str, bytes))
         
         # Test deserialization
-        restored = json.loads(json_str)
+        restored = _loads(encoded)
+        assert _canonical(restored) == _canonical(sample_response)
+        # One structural compare kept as a sanity check on _canonical itself
         assert restored == sample_response
         
         # Test response structure
@@ -176,6 +249,15 @@ class TestWebSocketAPIMocked:
         assert isinstance(sample_response['edges'], list)
         assert isinstance(sample_response['center_node'], str)
     
+    def test_websocket_response_msgpack_roundtrip(self, encoded_sample):
+        """Test the sample response survives MessagePack and packs smaller than JSON."""
+        msgpack = pytest.importorskip("msgpack")
+        sample_response, encoded = encoded_sample
+        
+        packed = msgpack.packb(sample_response, use_bin_type=True)
+        assert msgpack.unpackb(packed, raw=False) == sample_response
+        assert len(packed) < len(encoded)
+    
     def test_websocket_error_handling(self):
         """Test WebSocket error handling patterns."""
         # Test error response structure
@@ -201,34 +283,9 @@ class TestWebSocketAPIMocked:
             assert isinstance(error_response['error']['code'], str)
             assert isinstance(error_response['error']['message'], str)
     
-    def test_defensive_data_validation(self):
+    def test_defensive_data_validation(self, ws_api):
         """Test defensive data validation patterns used in WebSocket handlers."""
-        # Simulate the defensive validation pattern from websocket_api.py
-        def validate_graph_result(result):
-            """Simulate the validation logic added in v0.8.10."""
-            if not isinstance(result, dict):
-                raise ValueError(f"Graph service returned invalid result type: {type(result)}")
-            
-            nodes = result.get("nodes")
-            edges = result.get("edges")
-            center_node = result.get("center_node")
-            
-            # Apply defensive checks
-            if nodes is None:
-                nodes = []
-            elif not isinstance(nodes, (list, tuple)):
-                nodes = []
-                
-            if edges is None:
-                edges = []
-            elif not isinstance(edges, (list, tuple)):
-                edges = []
-            
-            return {
-                'nodes': nodes,
-                'edges': edges,
-                'center_node': center_node or 'unknown'
-            }
+        result_items = ws_api._result_items
         
         # Test with valid data
         valid_result = {
@@ -236,10 +293,8 @@ class TestWebSocketAPIMocked:
             'edges': [{'from_node': 'a', 'to_node': 'b'}],
             'center_node': 'light.test'
         }
-        validated = validate_graph_result(valid_result)
-        assert validated['nodes'] == valid_result['nodes']
-        assert validated['edges'] == valid_result['edges']
-        assert validated['center_node'] == valid_result['center_node']
+        assert result_items(valid_result, 'nodes') == valid_result['nodes']
+        assert result_items(valid_result, 'edges') == valid_result['edges']
         
         # Test with None values (the bug that was fixed in v0.8.10)
         invalid_result = {
@@ -247,10 +302,8 @@ class TestWebSocketAPIMocked:
             'edges': None,
             'center_node': 'light.test'
         }
-        validated = validate_graph_result(invalid_result)
-        assert validated['nodes'] == []
-        assert validated['edges'] == []
-        assert validated['center_node'] == 'light.test'
+        assert result_items(invalid_result, 'nodes') == []
+        assert result_items(invalid_result, 'edges') == []
         
         # Test with wrong types
         wrong_type_result = {
@@ -258,9 +311,17 @@ class TestWebSocketAPIMocked:
             'edges': 123,
             'center_node': 'light.test'
         }
-        validated = validate_graph_result(wrong_type_result)
-        assert validated['nodes'] == []
-        assert validated['edges'] == []
+        assert result_items(wrong_type_result, 'nodes') == []
+        assert result_items(wrong_type_result, 'edges') == []
+        
+        # Tuples are accepted and normalised to lists
+        tuple_result = {
+            'nodes': ({'id': 'light.test'},),
+            'edges': (),
+            'center_node': None
+        }
+        assert result_items(tuple_result, 'nodes') == [{'id': 'light.test'}]
+        assert result_items(tuple_result, 'edges') == []
     
     def test_websocket_connection_mock(self):
         """Test WebSocket connection mocking."""
@@ -277,60 +338,31 @@ class TestWebSocketAPIMocked:
         mock_connection.send_error(2, 'entity_not_found', 'Entity not found')
         mock_connection.send_error.assert_called_once_with(2, 'entity_not_found', 'Entity not found')
     
-    @pytest.mark.parametrize("command_type,required_params", [
-        ('ha_visualiser/search_entities', ['query']),
-        ('ha_visualiser/get_neighborhood', ['entity_id']),
-        ('ha_visualiser/get_filtered_neighborhood', ['entity_id']),
-        ('ha_visualiser/get_graph_statistics', [])
-    ])
-    def test_command_parameter_requirements(self, command_type, required_params):
+    def test_command_parameter_requirements(self):
         """Test parameter requirements for each WebSocket command."""
-        base_message = {'type': command_type, 'id': 1}
-        
-        if required_params:
-            # Test that message is invalid without required parameters
-            for param in required_params:
-                incomplete_message = base_message.copy()
-                # Missing the required parameter
-                has_required_param = param in incomplete_message
-                assert not has_required_param, f"Message should be missing required parameter {param}"
+        for command_type, required_params in _COMMAND_PARAM_CASES:
+            base_message = {'type': command_type, 'id': 1}
             
-            # Test that message is valid with required parameters
-            complete_message = base_message.copy()
-            for param in required_params:
-                if param == 'query':
-                    complete_message[param] = 'test_query'
-                elif param == 'entity_id':
-                    complete_message[param] = 'light.test'
+            # Message is invalid without the required parameters
+            present = base_message.keys() & required_params
+            assert not present, f"{command_type} message should be missing {present}"
             
-            # Should have all required parameters
-            for param in required_params:
-                assert param in complete_message, f"Complete message should have {param}"
-        else:
-            # Commands with no required parameters should be valid with just type and id
-            assert 'type' in base_message
-            assert 'id' in base_message
+            # Message is valid once every required parameter is supplied
+            complete_message = {
+                **base_message,
+                **{param: _PARAM_VALUES[param] for param in required_params},
+            }
+            assert complete_message.keys() >= required_params | {'id'}, (
+                f"{command_type} message should have {required_params}"
+            )
     
     def test_async_handler_patterns(self):
         """Test async handler patterns used in WebSocket API."""
-        # Test async mock setup
-        async_handler = AsyncMock()
-        
-        # Simulate async WebSocket handler
-        async def mock_websocket_handler(hass, connection, msg):
-            # Simulate async operations
-            await async_handler.some_async_operation()
-            return {'result': 'success'}
-        
         # Test that handler is async
-        import asyncio
-        assert asyncio.iscoroutinefunction(mock_websocket_handler)
-        
-        # Test mock async operation
-        async_handler.some_async_operation = AsyncMock()
+        assert asyncio.iscoroutinefunction(_mock_websocket_handler)
         
         # Verify mock can be awaited
-        assert hasattr(async_handler.some_async_operation, '__call__')
+        assert callable(_SHARED_ASYNC_HANDLER.some_async_operation)
     
     def test_graph_service_integration_points(self):
         """Test integration points between WebSocket API and GraphService."""
@@ -363,66 +395,29 @@ class TestWebSocketAPIMocked:
         assert callable(mock_graph_service.get_filtered_neighborhood)
         assert callable(mock_graph_service.get_graph_statistics)
     
-    def test_dataclass_to_dict_conversion(self):
+    def test_dataclass_to_dict_conversion(self, ws_api, encoded_sample):
         """Test conversion of dataclass objects to dictionaries for JSON serialization."""
         # Simulate the dataclass-to-dict conversion done in WebSocket handlers
+        sample_response, encoded = encoded_sample
         
-        # Mock dataclass objects
-        mock_node = Mock()
-        mock_node.id = 'light.test'
-        mock_node.label = 'Test Light'
-        mock_node.domain = 'light'
-        mock_node.area = 'Living Room'
-        mock_node.device_id = 'device123'
-        mock_node.state = 'on'
-        mock_node.icon = 'mdi:lightbulb'
-        
-        mock_edge = Mock()
-        mock_edge.from_node = 'device123'
-        mock_edge.to_node = 'light.test'
-        mock_edge.relationship_type = 'device_contains'
-        mock_edge.label = 'contains'
-        
-        # Simulate the serialization logic from websocket_api.py
-        def serialize_node(node):
-            return {
-                'id': node.id,
-                'label': node.label,
-                'domain': node.domain,
-                'area': node.area,
-                'device_id': node.device_id,
-                'state': node.state,
-                'icon': node.icon
-            }
-        
-        def serialize_edge(edge):
-            return {
-                'from_node': edge.from_node,
-                'to_node': edge.to_node,
-                'relationship_type': edge.relationship_type,
-                'label': edge.label
-            }
+        # Stand-ins for the GraphNode/GraphEdge dataclasses (attribute reads only)
+        mock_node = SimpleNamespace(**sample_response['nodes'][0])
+        mock_edge = SimpleNamespace(**sample_response['edges'][0])
         
         # Test serialization
-        serialized_node = serialize_node(mock_node)
-        serialized_edge = serialize_edge(mock_edge)
+        serialized_node = ws_api._serialize_node(mock_node)
+        serialized_edge = ws_api._serialize_edge(mock_edge)
         
         # Validate serialized structure
-        assert serialized_node['id'] == 'light.test'
+        assert serialized_node['id'] == 'light.living_room'
         assert serialized_node['domain'] == 'light'
         assert serialized_edge['from_node'] == 'device123'
         assert serialized_edge['relationship_type'] == 'device_contains'
         
-        # Test JSON serialization of result
+        # Serialized result should match the shared encoded payload
         serialized_result = {
             'nodes': [serialized_node],
             'edges': [serialized_edge],
-            'center_node': 'light.test'
+            'center_node': mock_node.id
         }
-        
-        json_str = json.dumps(serialized_result)
-        assert isinstance(json_str, str)
-        
-        # Verify round-trip serialization
-        restored = json.loads(json_str)
-        assert restored == serialized_result
\ No newline at end of file
+        assert _canonical(serialized_result) == _canonical(_loads(encoded))
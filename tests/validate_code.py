@@ -2,16 +2,91 @@
 """Code validation script for syntax and basic structure checks."""
 
 import ast
+import contextlib
+import hashlib
+import json
+import mmap
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Marker files for content already known to be valid, so warm runs skip parsing
+_CACHE_DIR = Path(".validate_cache")
+
+# Files larger than this are memory-mapped rather than read
+_MMAP_THRESHOLD = 256 * 1024
+
+# Keep at most this many markers; the least recently used are pruned
+_CACHE_MAX_ENTRIES = 256
+
+# What parses depends on the interpreter, so markers are per Python version
+_PY_VERSION = "{}.{}".format(*sys.version_info[:2]).encode()
+
+def _cache_key(kind, data):
+    """Hash data into a marker name, namespaced by check kind and Python version."""
+    return hashlib.blake2b(data, digest_size=16, person=kind + _PY_VERSION).hexdigest()
+
+def _prune_cache():
+    """Delete all but the _CACHE_MAX_ENTRIES most recently used markers."""
+    try:
+        markers = sorted(os.scandir(_CACHE_DIR), key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    except FileNotFoundError:
+        return
+    for entry in markers[_CACHE_MAX_ENTRIES:]:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(entry.path)
+
+def _cached_check(file_path, kind, check):
+    """Run check(content) unless file_path is already known to be valid.
+    
+    An unchanged (path, mtime, size) skips even reading the file; otherwise
+    a blake2b hash of the content is looked up before running the check,
+    which raises on invalid content. Returns True on a cache hit.
+    """
+    st = os.stat(file_path)
+    stat_id = f"{Path(file_path).resolve()}:{st.st_mtime_ns}:{st.st_size}"
+    stat_marker = _CACHE_DIR / _cache_key(kind, stat_id.encode())
+    if stat_marker.exists():
+        stat_marker.touch()  # Mark as recently used so pruning keeps it
+        return True
+    
+    with open(file_path, 'rb') as f:
+        # Map large files instead of copying them into a bytes object
+        if st.st_size > _MMAP_THRESHOLD:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            content = f.read()
+        try:
+            content_marker = _CACHE_DIR / _cache_key(kind, content)
+            cached = content_marker.exists()
+            if not cached:
+                check(content)
+        finally:
+            if isinstance(content, mmap.mmap):
+                content.close()
+    
+    _CACHE_DIR.mkdir(exist_ok=True)
+    content_marker.touch()
+    stat_marker.touch()
+    return cached
+
 def validate_python_syntax(file_path):
     """Validate Python syntax of a file."""
     try:
-        with open(file_path, 'r') as f:
-            content = f.read()
-        ast.parse(content)
-        return True, "OK"
+        # Parse straight from the raw bytes; the parser handles the source encoding
+        cached = _cached_check(
+            file_path,
+            b'python',
+            lambda source: compile(source, str(file_path), 'exec', flags=ast.PyCF_ONLY_AST, dont_inherit=True),
+        )
+        return True, "OK (cached)" if cached else "OK"
     except SyntaxError as e:
         return False, f"Syntax error: {e}"
     except Exception as e:
@@ -31,10 +106,17 @@ def validate_integration():
     
     all_valid = True
     
+    existing = [path for path in files_to_check if Path(path).exists()]
+    # Parsing is CPU-bound, so fan out across processes unless the pool would cost more
+    if len(existing) > 2:
+        with ProcessPoolExecutor() as executor:
+            results = dict(zip(existing, executor.map(validate_python_syntax, existing)))
+    else:
+        results = {path: validate_python_syntax(path) for path in existing}
+    
     for file_path in files_to_check:
-        path = Path(file_path)
-        if path.exists():
-            valid, message = validate_python_syntax(path)
+        if file_path in results:
+            valid, message = results[file_path]
             status = "✓" if valid else "✗"
             print(f"{status} {file_path}: {message}")
             if not valid:
@@ -46,20 +128,20 @@ def validate_integration():
     manifest_path = Path('custom_components/ha_visualiser/manifest.json')
     if manifest_path.exists():
         try:
-            import json
-            with open(manifest_path) as f:
-                json.load(f)
+            _cached_check(manifest_path, b'json', _json_loads)
             print(f"✓ {manifest_path}: Valid JSON")
         except json.JSONDecodeError as e:
             print(f"✗ {manifest_path}: Invalid JSON - {e}")
             all_valid = False
     
+    _prune_cache()
+    
     print(f"\n=== Summary ===")
     if all_valid:
         print("✓ All syntax checks passed!")
         print("\nNext steps for testing:")
         print("1. Install pytest: pip install -r requirements-test.txt")
-        print("2. Run unit tests: python -m pytest tests/")
+        print("2. Run unit tests: python -m pytest tests/ -n auto")
         print("3. Copy to HA custom_components/ for integration testing")
         print("4. Restart HA and check logs for any errors")
     else: